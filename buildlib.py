@@ -0,0 +1,251 @@
+# Shared build logic for the DeepSkyForge PixInsight update repositories.
+# Project specifics (script folder, .xri files, archive names) come in through
+# the config dict passed to build(); see builder.py for the GraXpert Suite one.
+
+# iterparse resolves to the C accelerator (_elementtree) on CPython
+from xml.etree.ElementTree import iterparse
+import zipfile
+import os
+import hashlib
+import shutil
+import sys
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Optional: route deflate through ISA-L (2x+ faster than stdlib zlib at the
+# same ratio) when python-isal is installed; stdlib zlib otherwise.
+try:
+    from isal import isal_zlib as zlib
+    zipfile.zlib = zlib
+except ImportError:
+    import zlib
+
+# template tokens substituted into the .xri files, fused into one scan
+TOKENS = re.compile(r'_ZIP_FILENAME_|_SHA1_|_DATE_|_CHANGELOG_')
+
+# precompiled once instead of on every extract_* call
+VERSION_RE = re.compile(r'#define VERSION "v(\d+\.\d+\.\d+)"')
+CHANGELOG_RE = re.compile(r"\d{2}/\d{2}/\d{4} v(\d+\.\d+\.\d+)(.*?)\d{2}/\d{2}/\d{4}", re.DOTALL)
+
+def extract_version(filename):
+    with open(filename, 'r') as file:
+        content = file.read()
+
+    match = VERSION_RE.search(content)
+
+    if not match:
+        raise ValueError("Version not found")
+
+    return match.group(1)
+
+def extract_version_changelog(filename, start_marker='-', end_marker='-'):
+    with open(filename, 'r') as file:
+        content = file.read()
+
+    match = CHANGELOG_RE.search(content)
+
+    if not match:
+        raise ValueError("Change log extract failed")
+
+    version = match.group(1).strip()
+    # drop separator lines (only whitespace/dashes) without a multiline regex pass
+    changelog = '\n'.join(line for line in match.group(2).strip().splitlines() if line.strip(' \t-'))
+
+    return version, changelog
+
+def extract_files_from_remove_section(xml_file):
+    try:
+        # Stream-parse the XML and stop at the first <remove> element instead
+        # of materializing the whole document
+        for event, elem in iterparse(xml_file, events=('end',)):
+            if elem.tag.rpartition('}')[2] == 'remove':
+                # Exclude empty strings from the list
+                files_list = [file.strip() for file in elem.text.split(",") if file.strip()]
+                elem.clear()
+
+                # Check if the list is not empty before returning
+                if files_list:
+                    return files_list
+                else:
+                    raise ValueError("No valid files found in the <remove> section.")
+            elem.clear()
+        raise ValueError("<remove> section not found in the XML.")
+    except Exception as e:
+        raise ValueError(f"XML Parsing {xml_file}: {e}")
+
+def deflate_entry(file):
+    # worker: read and deflate one file (raw deflate stream, as stored in zip entries)
+    with open(file, 'rb') as f:
+        data = f.read()
+    compressor = zlib.compressobj(wbits=-15)
+    return file, compressor.compress(data) + compressor.flush(), zlib.crc32(data), len(data)
+
+def append_precompressed(zipf, info, data):
+    # append an already-deflated entry without re-compressing it
+    info.header_offset = zipf.fp.tell()
+    zipf.fp.write(info.FileHeader(False))
+    zipf.fp.write(data)
+    zipf.start_dir = zipf.fp.tell()
+    zipf.filelist.append(info)
+    zipf.NameToInfo[info.filename] = info
+
+def save_list_to_zip(files_list, script_folder, output_directory, manual_zip, required_prefix):
+    try:
+        # snapshot existing files in one walk instead of stat-ing per entry
+        existing = {os.path.join(dirpath, name).replace(os.sep, '/')
+                    for root in (f"src/scripts/{script_folder}", "doc/scripts")
+                    for dirpath, _, names in os.walk(root)
+                    for name in names}
+
+        # check path (prefixes hoisted out of the loop; slice compare avoids
+        # rebuilding the f-string per file)
+        src_prefix = f"src/scripts/{script_folder}/"
+        src_len = len(src_prefix)
+        doc_prefix = "doc/scripts/"
+        doc_len = len(doc_prefix)
+        local_files = []
+        seen = set()
+        for file in files_list:
+            if file == '':
+                continue
+            elif (file[:src_len] != src_prefix and file[:doc_len] != doc_prefix):
+                raise Exception(f"Invalid path {file}")
+            elif file not in existing and not file.startswith(required_prefix):
+                print(f"Delete '{file}'")
+            elif file not in existing and file.startswith(required_prefix):
+                raise Exception(f"File '{file}' not found.")
+            elif file in seen:
+                raise Exception(f"Duplicate file '{file}'")
+            else:
+                local_files.append(file)
+                seen.add(file)
+
+        # define eip file name
+        zip_file = f"{script_folder}.zip"
+
+        # build zip for standard install
+        date_prefix = datetime.now().strftime("%Y%m%d")
+        zip_file_date = f"{date_prefix}_{zip_file}"
+        print(f"\nBuild {zip_file_date} for automatic install")
+        zip_file_path = os.path.join(output_directory, zip_file_date)
+        # deflate entries in parallel (one independent stream per file) and
+        # stitch the pre-compressed blocks into the archive in list order;
+        # threads suffice because zlib releases the GIL while compressing, so
+        # one entry's read overlaps another's deflate without process overhead
+        with zipfile.ZipFile(zip_file_path, 'w', zipfile.ZIP_DEFLATED) as zipf, \
+                ThreadPoolExecutor(max_workers=os.cpu_count()) as pool:
+            for file, data, crc, size in pool.map(deflate_entry, local_files):
+                info = zipfile.ZipInfo.from_file(file)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.CRC = crc
+                info.compress_size = len(data)
+                info.file_size = size
+                append_precompressed(zipf, info, data)
+        # one write() instead of a line-buffered flush per entry
+        sys.stdout.write("+ " + "\n+ ".join(local_files) + "\n")
+
+        # create zip file for manual install
+        print(f"\nBuild {manual_zip} for manual install")
+        manual_zip_path = os.path.join(output_directory, manual_zip)
+        try:
+            # entries are deflated exactly once: both install archives carry the
+            # same arcnames, so the manual zip is a hardlink to the dated one
+            # (metadata-only, nothing re-read or re-compressed)
+            os.link(zip_file_path, manual_zip_path)
+        except OSError:
+            # filesystem without hardlink support
+            shutil.copyfile(zip_file_path, manual_zip_path)
+
+        return zip_file_path
+    except Exception as e:
+        raise ValueError(f"{e}")
+
+
+def replace_and_save(source_path, dest_directory, zip_file_path, changelog, version):
+    # Check if the source file exists
+    if not os.path.isfile(source_path):
+        print(f"The source file '{source_path}' does not exist.")
+        return
+    print(f"\nBuild update file from {os.path.basename(source_path)}")
+
+    # Check if the source file exists
+    if not os.path.isfile(zip_file_path):
+        print(f"The source file '{zip_file_path}' does not exist.")
+        return
+    zip_base = os.path.basename(zip_file_path)
+    print(f"+ ZIP file: {zip_file_path}")
+
+    # define creation date (YYYYMMDD)
+    current_date = datetime.now().strftime("%Y%m%d%H%M%S")
+    print(f"+ Date & Time: {current_date}")
+
+    # Calculate the SHA1 of the zip file (file_digest hashes in C with the GIL released)
+    if hasattr(hashlib, 'file_digest'):
+        with open(zip_file_path, 'rb') as f:
+            sha1 = hashlib.file_digest(f, 'sha1')
+    else:
+        # Python < 3.11: unbuffered reads into one reusable 1 MiB buffer, so
+        # there is no per-chunk bytes allocation and no double buffering.
+        # usedforsecurity=False selects OpenSSL's EVP path (SHA-NI when available);
+        # the digest stays SHA1 because PixInsight verifies the sha1= attribute.
+        sha1 = hashlib.new('sha1', usedforsecurity=False)
+        buf = bytearray(1 << 20)
+        view = memoryview(buf)
+        with open(zip_file_path, 'rb', buffering=0) as f:
+            while (n := f.readinto(buf)):
+                sha1.update(view[:n])
+    sha1_hex = sha1.hexdigest()
+    print(f"+ SHA1 zip file: {sha1_hex}")
+
+    # Read the content of the source file
+    with open(source_path, 'r') as source_file:
+        file_content = source_file.read()
+
+    # Replace all template tokens in a single pass over the content
+    subs = {
+        "_ZIP_FILENAME_": zip_base,
+        "_SHA1_": sha1_hex,
+        "_DATE_": current_date,
+        "_CHANGELOG_": "Changelog v" + version + ":</p>\n\t\t\t<p>" + changelog.replace("\n", "</p>\n\t\t\t<p>"),
+    }
+    file_content = TOKENS.sub(lambda m: subs[m.group(0)], file_content)
+
+    # Build the destination file path with the same name in the specified directory
+    dest_filename = os.path.join(dest_directory, "updates.xri")
+
+    # Write the modified content to the destination file
+    with open(dest_filename, 'w') as dest_file:
+        dest_file.write(file_content)
+
+    print(f"\n===> {dest_filename}")
+
+
+def build(config):
+    # extract version from the project's version file
+    print("\nGet version and changelog")
+    version = extract_version(config["version_file"])
+    changelog_version, changelog = extract_version_changelog(config["changelog_file"])
+    if changelog_version != version:
+        raise ValueError(f"Wrong version (changelog {changelog_version} / {os.path.basename(config['version_file'])} {version})")
+
+    # create repository (rename the old one out of the way and delete it
+    # in the background so the build does not wait on the unlinks)
+    output_directory = config["output_directory"]
+    if os.path.exists(output_directory):
+        old_directory = f"{output_directory}.old.{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+        os.rename(output_directory, old_directory)
+        threading.Thread(target=shutil.rmtree, args=(old_directory,)).start()
+
+    # create packages
+    for updates_xml_file in config["updates_files"]:
+        files_list = extract_files_from_remove_section(updates_xml_file)
+        package = updates_xml_file.replace("updates", config["package_prefix"]).replace(".xri", "")
+        destination = os.path.join(output_directory, package)
+        os.makedirs(destination, exist_ok=True)
+        if files_list:
+            zip_file_path = save_list_to_zip(files_list, config["script_folder"], destination,
+                                             config["manual_zip_names"][package], config["required_prefix"])
+            replace_and_save(updates_xml_file, destination, zip_file_path, changelog, version)
+    print("\nRUN PIXINSIGHT CODE SIGNING AGAIN TO SIGN updates.xri FILES")